@@ -2,11 +2,13 @@ import os
 import shutil
 from pathlib import Path
 import logging
+import functools
 import numpy as np
 import pandas as pd
-from dask.distributed import Client, LocalCluster
+import dask
 import dask.dataframe as dd
 import dask.array as da
+import matplotlib
 import re
 from src.utils import utils
 from tqdm import tqdm
@@ -19,6 +21,256 @@ logging.getLogger("distributed.worker_memory").setLevel(logging.CRITICAL)
 # help pd output better fit in console
 pd.set_option("display.max_colwidth", 20)
 
+# figures are only saved to files, avoid the interactive backend unless one is requested
+if "MPLBACKEND" not in os.environ:
+    matplotlib.use("Agg")
+
+# matches unit annotations such as [m/s] in unclean csv values
+_UNIT_RE = re.compile(r"\[.*?\]")
+# matches csv headers of the x, y and z coordinate columns
+_COORD_RE = re.compile(r"\s*([xyz])", re.IGNORECASE)
+
+
+def _styled(method):
+    """
+    run a plotting method of POD with its font settings in a temporary rc context,
+    so the global matplotlib rcParams are left untouched
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        style = {"font.family": self.font, "font.size": self.fontsize}
+        with matplotlib.rc_context(style):
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+def _read_csv_arrow(path, delimiter=",", skiprows=0, usecols=None, nrows=None):
+    """
+    read a csv file into a pyarrow Table using the multithreaded arrow parser
+    when nrows is given the file is streamed and only the blocks holding those rows are parsed
+    """
+    import pyarrow as pa
+    from pyarrow import csv
+
+    options = dict(
+        read_options=csv.ReadOptions(use_threads=True, skip_rows=skiprows),
+        parse_options=csv.ParseOptions(delimiter=delimiter),
+        convert_options=csv.ConvertOptions(include_columns=usecols),
+    )
+    if nrows is None:
+        return csv.read_csv(path, **options)
+
+    batches = []
+    with csv.open_csv(path, **options) as reader:
+        for batch in reader:
+            batches.append(batch)
+            nrows -= batch.num_rows
+            if nrows <= 0:
+                break
+    table = pa.Table.from_batches(batches, schema=reader.schema)
+    return table.slice(0, table.num_rows + min(nrows, 0))
+
+
+def _read_csv(
+    path, delimiter=",", skiprows=0, usecols=None, nrows=None, engine="pandas"
+):
+    """
+    read a csv file into a pandas DataFrame with either the "pandas" or "arrow" engine
+    the arrow engine returns arrow backed columns which avoids copying into numpy blocks
+    """
+    if engine == "arrow":
+        table = _read_csv_arrow(path, delimiter, skiprows, usecols, nrows)
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+    if engine == "pandas":
+        return pd.read_csv(
+            path, sep=delimiter, skiprows=skiprows, usecols=usecols, nrows=nrows
+        )
+    raise ValueError(f"unknown csv engine {engine}, use 'pandas' or 'arrow'")
+
+
+def _strip_units(df):
+    """remove unit annotations e.g. 3.123 [m/s] column by column and convert to float"""
+    stripped = {}
+    for col in df.columns:
+        stripped[col] = df[col].astype(str).str.replace(_UNIT_RE, "", regex=True)
+    return pd.DataFrame(stripped).astype(np.float64)
+
+
+def _standardize(signals, ddof=0):
+    """zero mean, unit variance columns of signals as a float64 array"""
+    signals = np.asarray(signals, dtype=np.float64)
+    return (signals - signals.mean(axis=0)) / signals.std(axis=0, ddof=ddof)
+
+
+def _spectra(signals, n):
+    """rfft of the standardized columns of signals zero padded to length n"""
+    from scipy.fft import rfft
+
+    return rfft(_standardize(signals), n=n, axis=0, workers=-1)
+
+
+def _fft_length(len1, len2, maxlag=None):
+    """
+    fast zero padded transform length for correlating signals of length len1 and len2
+    without circular wrap-around, for all lags or only lags up to maxlag
+    """
+    from scipy.fft import next_fast_len
+
+    if maxlag is None:
+        return next_fast_len(len1 + len2 - 1, real=True)
+    return next_fast_len(max(len1, len2) + maxlag, real=True)
+
+
+def _correlate_spectra(f1, f2, n, len1, len2, maxlag=None):
+    """
+    pearson's index and maximum lagged correlation from the spectra of standardized signals
+    of length len1 and len2, see POD.correlate. f1 of shape (n // 2 + 1, 1) is correlated
+    with every column of f2 at once. with maxlag only lags within +-maxlag are searched
+    """
+    from scipy.fft import irfft
+
+    corr = irfft(f1 * np.conj(f2), n=n, axis=0, workers=-1) / len1
+    window = max(int(len1 * 0.01), 5)
+    if maxlag is None:
+        # reorder the circular lags to the -(len2-1)..(len1-1) layout of a full correlation
+        corr = np.concatenate([corr[n - len2 + 1 :], corr[:len1]])
+        zerolag = int(len(corr) / 2)
+    else:
+        corr = np.concatenate([corr[n - maxlag :], corr[: maxlag + 1]])
+        zerolag = maxlag
+        # a window wider than the searched lags would leave no smoothed value to pick
+        window = min(window, maxlag + 1)
+    corr_smooth = (
+        pd.DataFrame(corr).rolling(window=window, center=True, closed="both").mean()
+    )
+    lagindex = np.nanargmax(corr_smooth.to_numpy(), axis=0)
+
+    corrcoef = corr[zerolag]
+    corrcoef_adj = corr[lagindex, np.arange(corr.shape[1])]
+    return corrcoef, corrcoef_adj
+
+
+def _correlate_batch(a, b, maxlag=None):
+    """
+    pearson's index and maximum lagged correlation between every column of a and every
+    column of b. gives the same result as POD.correlate on each pair, but each signal is
+    transformed only once and each column of a is correlated with all of b in one pass
+
+    Returns:
+        (tuple): pearson's index and maximum correlation arrays of shape (a columns, b columns)
+    """
+    len1, len2 = len(a), len(b)
+    if maxlag is not None:
+        maxlag = min(maxlag, len1 - 1, len2 - 1)
+    n = _fft_length(len1, len2, maxlag)
+    spectra = _spectra(a, n)
+    spectra2 = _spectra(b, n)
+    corrcoef = np.empty((spectra.shape[1], spectra2.shape[1]))
+    corrcoef_adj = np.empty_like(corrcoef)
+    for i in tqdm(range(spectra.shape[1]), "computing correlations"):
+        corrcoef[i], corrcoef_adj[i] = _correlate_spectra(
+            spectra[:, i : i + 1], spectra2, n, len1, len2, maxlag
+        )
+    return corrcoef, corrcoef_adj
+
+
+def _cumulative_energy(s, total=None):
+    """
+    cumulative share of mode energy in percent from the singular values s,
+    for a 2D array every column is treated as a separate set of singular values.
+    total is the energy to normalize by, defaults to the sum of s**2
+    """
+    energy = np.square(np.asarray(s, dtype=np.float64))
+    total = energy.sum(axis=0) if total is None else np.asarray(total)
+    return np.cumsum(energy * (100.0 / total), axis=0)
+
+
+def _read_singular_values(path):
+    """
+    singular values of a variable and the total energy of its snapshots. the total is
+    stored next to s for truncated decompositions, otherwise it is the sum of s**2
+    """
+    s = np.asarray(utils.loadit(Path(path) / "s.pkl"), dtype=np.float64)
+    path_energy = Path(path) / "energy.pkl"
+    total = utils.loadit(path_energy) if path_energy.exists() else np.square(s).sum()
+    return s, total
+
+
+def _var_label(var):
+    """plot label of a variable name, units removed and dots replaced by spaces"""
+    return _UNIT_RE.sub("", var).replace(".", " ")
+
+
+def _mode_formatter(maxmode):
+    """
+    minor tick formatter numbering the modes inside each variable block of a
+    correlation map, only every int((maxmode + 1) / 5)th mode gets a label
+    """
+    from matplotlib.ticker import FuncFormatter
+
+    labelled = np.arange(0, maxmode - 1, int((maxmode + 1) / 5))
+
+    def _format(x, pos):
+        return f"{x % maxmode:.0f}" if (x % maxmode) in labelled else ""
+
+    return FuncFormatter(_format)
+
+
+def _parquet_files(path):
+    """
+    files of a parquet dataset in the natural order dask reads and writes them,
+    part.2 comes before part.10
+    """
+    from dask.utils import natural_sort_key
+
+    return sorted(map(str, Path(path).glob("*.parquet")), key=natural_sort_key)
+
+
+def _read_modes(path_v, maxmode):
+    """
+    read the leading maxmode rows of a stored v dataset as a (time, mode) DataFrame
+    only the row groups needed for those rows are read, skipping the dask scheduler
+    """
+    import pyarrow.dataset as ds
+
+    # pyarrow orders a directory lexicographically, pass the files in dask's order
+    dataset = ds.dataset(_parquet_files(path_v), format="parquet")
+    df = dataset.head(maxmode).to_pandas()
+    return df.rename_axis(None).transpose()
+
+
+def _read_mode_block(paths_v, maxmode):
+    """
+    read the leading maxmode modes of several v datasets side by side into one
+    preallocated (time, mode) DataFrame. time steps missing from any of the
+    datasets or holding NaN values are dropped
+    """
+    frames = [_read_modes(path_v, maxmode) for path_v in paths_v]
+    block = np.full(
+        (max(len(f) for f in frames), sum(f.shape[1] for f in frames)), np.nan
+    )
+    start = 0
+    for f in frames:
+        block[: len(f), start : start + f.shape[1]] = f.to_numpy()
+        start += f.shape[1]
+    # the stored coefficients are normally dense, only copy when rows must be dropped
+    valid = ~np.isnan(block).any(axis=1)
+    if not valid.all():
+        block = block[valid]
+    return pd.DataFrame(block, columns=np.concatenate([f.columns for f in frames]))
+
+
+def _parquet_lengths(path):
+    """
+    row counts of the files of a parquet dataset in the order dask reads them,
+    taken from the file footers so no data pages are touched
+    """
+    import pyarrow.parquet as pq
+
+    return tuple(pq.read_metadata(f).num_rows for f in _parquet_files(path))
+
 
 class POD:
     """
@@ -48,6 +300,16 @@ class POD:
 
     """
 
+    # codec used for all parquet datasets, zstd at level 1 compresses float columns
+    # noticeably better than snappy at similar encode and decode speed
+    parquet_compression = "zstd"
+    parquet_compression_level = 1
+    # rows per parquet row group, row group statistics allow readers to skip data
+    parquet_row_group_size = 100_000
+    # the _metadata summary file costs a serial gather of all footers on every write,
+    # the datasets are read back by directory discovery so it is off by default
+    parquet_metadata_file = False
+
     def __init__(self, show_dashboard=False) -> None:
         """
         initializes a PARAMOUNT POD class
@@ -57,16 +319,36 @@ class POD:
 
         self.cluster, self.client = self.create_cluster(show_dashboard)
         self.set_viz_params()
+        self._dist_cache = {}
+        self._coord_cache = {}
+
+    def __getstate__(self):
+        """the dask cluster and client stay in the parent process when POD is pickled"""
+        state = self.__dict__.copy()
+        state.update(cluster=None, client=None)
+        return state
 
     def create_cluster(self, show_dashboard):
         """
         create_cluster create a dask cluster. modify LocalCluster for parallel runs on
         remote clusters. webbrowser.open() shows the dask operation in browser.
+        the workload is mostly csv parsing and parquet io which release the GIL, so a few
+        worker processes with many threads each are used and the memory is split between them.
 
         Returns:
             tuple: cluster, client
         """
-        cluster = LocalCluster(dashboard_address="localhost:8000")
+        import psutil
+        from dask.distributed import Client, LocalCluster
+
+        cores = os.cpu_count()
+        n_workers = max(1, cores // 8)
+        cluster = LocalCluster(
+            n_workers=n_workers,
+            threads_per_worker=max(2, cores // n_workers),
+            memory_limit=psutil.virtual_memory().total // n_workers,
+            dashboard_address="localhost:8000",
+        )
         client = Client(cluster)
 
         print(client.cluster)
@@ -80,7 +362,7 @@ class POD:
 
     @staticmethod
     def read_csv_columns(
-        path_csv=Path.cwd(), skiprows=0, delimiter=",", boolPrint=True
+        path_csv=Path.cwd(), skiprows=0, delimiter=",", boolPrint=True, engine="pandas"
     ):
         """
         read_csv_columns get columns of a csv file and print the headers
@@ -91,6 +373,7 @@ class POD:
             skiprows (int, optional): rows to skip in each csv file. Defaults to 0.
             delimiter (str, optional): delimiter used in csv files. Defaults to ",".
             boolPrint (bool, optional): whether to print our the columns. Defaults to True.
+            engine (str, optional): csv parser, "pandas" or "arrow". Defaults to "pandas".
 
         Returns:
             list: the headers found in the first csv file
@@ -101,7 +384,7 @@ class POD:
             list: headers in csv file
         """
         pathlist = sorted(Path(path_csv).resolve().glob("*.csv"))
-        df = pd.read_csv(pathlist[0], sep=delimiter, skiprows=skiprows)
+        df = _read_csv(pathlist[0], delimiter, skiprows, engine=engine)
         print(df.head())
         headers = df.columns.tolist()
         if boolPrint:
@@ -124,8 +407,9 @@ class POD:
         if not files.is_dir():
             os.makedirs(files)
 
-        folderlist = [f for f in files.iterdir() if f.is_dir()]
-        folderlist = [folder.parts[-1] for folder in folderlist]
+        # DirEntry.is_dir is answered from the directory listing without a stat per entry
+        with os.scandir(files) as it:
+            folderlist = [entry.name for entry in it if entry.is_dir()]
         if boolPrint:
             print(pd.DataFrame({"Available folders": folderlist}))
         return folderlist
@@ -140,10 +424,14 @@ class POD:
         i_end=None,
         delimiter=",",
         skiprows=0,
+        engine="pandas",
     ):
         """
         csv_to_parquet read all csv files in path and save desired variables in parquet format
         x, y, z spatial values are read from the first csv file
+        the "arrow" engine parses the files with pyarrow and writes one parquet file per variable
+        without going through dask. it is faster but holds all snapshots of one variable in memory
+        at a time, and every file is parsed once per variable
 
 
         Args:
@@ -155,6 +443,7 @@ class POD:
             i_end (_type_, optional): index for last CSV file. Defaults to None which means consider all files.
             delimiter (str, optional): delimiter in CSV file. Defaults to ",".
             skiprows (int, optional): number of rows to skip. Defaults to 0.
+            engine (str, optional): csv parser, "pandas" or "arrow". Defaults to "pandas".
 
         Raises:
             ValueError: checking for existing folders and warn user about unwanted overwrites
@@ -187,41 +476,84 @@ class POD:
         else:
             pathlist = pathlist[i_start:]
 
-        df = pd.read_csv(pathlist[0], sep=delimiter, skiprows=skiprows)
-
-        try:
-            for item in df.columns:
-                if re.match(r"\s*" + "x", item, re.IGNORECASE):
-                    variables.remove(item)
-                    if "x" in self.dim:
-                        utils.saveit(df[item], f"{path_parquet}/x.pkl")
-                if re.match(r"\s*" + "y", item, re.IGNORECASE):
-                    variables.remove(item)
-                    if "y" in self.dim:
-                        utils.saveit(df[item], f"{path_parquet}/y.pkl")
-                if re.match(r"\s*" + "z", item, re.IGNORECASE):
-                    variables.remove(item)
-                    if "z" in self.dim:
-                        utils.saveit(df[item], f"{path_parquet}/z.pkl")
-        except Exception as e:
-            print(f"warning: you did not specify all coordinate variables: {e}")
+        df = _read_csv(pathlist[0], delimiter, skiprows, engine=engine)
+
+        saved = ""
+        for item in df.columns:
+            match = _COORD_RE.match(item)
+            if match is None or item not in variables:
+                continue
+            coord = match.group(1).lower()
+            variables.remove(item)
+            if coord in self.dim:
+                # coordinates are pickled numpy backed whatever the csv engine
+                utils.saveit(df[item].astype(np.float64), f"{path_parquet}/{coord}.pkl")
+                saved += coord
+        missing = [coord for coord in self.dim if coord not in saved]
+        if missing:
+            print(f"warning: you did not specify all coordinate variables: {missing}")
+
+        if engine == "arrow":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            names = [path.stem for path in pathlist]
+            # one variable at a time, so only that variable's snapshots are held in memory
+            for var in tqdm(variables, "writing parquet database"):
+                columns = [
+                    _read_csv_arrow(path_csv, delimiter, skiprows, [var]).column(var)
+                    for path_csv in tqdm(pathlist, "analyzing csv files", leave=False)
+                ]
+                utils.ensure_dir(f"{path_parquet}/{var.strip()}")
+                pq.write_table(
+                    pa.table(columns, names=names),
+                    f"{path_parquet}/{var.strip()}/part.0.parquet",
+                    compression=self.parquet_compression,
+                    compression_level=self.parquet_compression_level,
+                    row_group_size=self.parquet_row_group_size,
+                )
+                del columns
+            return
 
         results = [[] for x in range(len(variables))]
 
+        # each csv file is parsed once for all variables of interest. the columns
+        # are known from the first file, so no file is sampled to infer metadata
+        meta = df[[col for col in df.columns if col in variables]].iloc[:0]
         for path_csv in tqdm(pathlist, "analyzing csv files"):
+            result = dd.from_map(
+                _read_csv,
+                [path_csv],
+                delimiter=delimiter,
+                skiprows=skiprows,
+                usecols=variables,
+                meta=meta,
+            )
             for i, var in enumerate(variables):
-                result = dd.read_csv(path_csv, sep=delimiter, skiprows=skiprows)
                 results[i].append(result[var])
 
+        # aim for ~150MB float64 partitions. the size follows from the point and file
+        # counts, repartitioning by partition_size would parse every csv to measure it
+        nbytes = len(df) * len(pathlist) * 8
+        npartitions = max(1, int(np.ceil(nbytes / 150e6)))
+
+        writes = []
         for i, var in enumerate(tqdm(variables, "writing parquet database")):
             df = dd.concat(results[i], axis=1, ignore_unknown_divisions=True)
             df.columns = [path.stem for path in pathlist]
-            dd.to_parquet(
-                df.repartition(partition_size="150MB", force=True),
-                f"{path_parquet}/{var.strip()}",
-                compression="snappy",
-                write_metadata_file=True,
+            writes.append(
+                dd.to_parquet(
+                    df.repartition(npartitions=npartitions),
+                    f"{path_parquet}/{var.strip()}",
+                    compression=self.parquet_compression,
+                    compression_level=self.parquet_compression_level,
+                    row_group_size=self.parquet_row_group_size,
+                    write_metadata_file=self.parquet_metadata_file,
+                    compute=False,
+                )
             )
+        # compute all writes together so the shared csv reads run only once
+        dask.compute(*writes)
 
     @staticmethod
     def extract_csv_sequential(
@@ -233,6 +565,7 @@ class POD:
         tol=1e-3,
         skiprows=0,
         booldisplay=False,
+        engine="pandas",
     ):
         """
         extract_csv_sequential extract data from a point in sequential manner
@@ -246,19 +579,20 @@ class POD:
             z0 (float, optional): targer z coordinate. Defaults to 0.
             tol (float, optional): tolerance for point detection. Defaults to 1e-3.
             skiprows (int, optional): rows to skip in csv files. Defaults to 0.
+            engine (str, optional): csv parser for the first file, "pandas" or "arrow". Defaults to "pandas".
         """
         pathlist = sorted(Path(path_csv).resolve().glob("*.csv"))
-        df = pd.read_csv(pathlist[0], sep=delimiter, skiprows=skiprows)
+        df = _read_csv(pathlist[0], delimiter, skiprows, engine=engine)
 
-        x = df.iloc[:, 0]
-        y = df.iloc[:, 1]
+        x = df.iloc[:, 0].to_numpy()
+        y = df.iloc[:, 1].to_numpy()
 
-        tol = 1e-3
-
-        for i in range(len(x)):
-            if abs(x[i] - x0) < tol and abs(y[i] - y0) < tol:
-                index = i
-                break
+        # y is only compared for the few points already matching x0
+        candidates = np.flatnonzero(np.abs(x - x0) < tol)
+        matches = candidates[np.abs(y[candidates] - y0) < tol]
+        if not len(matches):
+            raise ValueError(f"no point found within {tol} of ({x0}, {y0})")
+        index = int(matches[0])
 
         if booldisplay:
             import matplotlib.pyplot as plt
@@ -272,13 +606,23 @@ class POD:
 
         variables = df.columns[3:]
 
-        results = []
-        for path_csv in tqdm(pathlist, "analyzing csv files"):
-            result = pd.read_csv(path_csv, sep=delimiter, skiprows=skiprows)
-            results.append(result.iloc[index, :])
-        results = pd.concat(results, axis=1)
-        results.columns = [path.stem for path in pathlist]
-        results = results.T
+        # only parse the row of the target point, reading the files in parallel
+        # on the active dask client (or the local scheduler when there is none)
+        read_row = dask.delayed(pd.read_csv)
+        rows = [
+            read_row(
+                path_csv,
+                sep=delimiter,
+                skiprows=skiprows + 1 + index,
+                nrows=1,
+                header=None,
+                names=df.columns,
+            )
+            for path_csv in pathlist
+        ]
+        rows = dask.compute(*rows)
+        results = pd.concat(rows, ignore_index=True)
+        results.index = [path.stem for path in pathlist]
         print(results)
         utils.ensure_dir(path_save)
         for var in variables:
@@ -290,6 +634,7 @@ class POD:
         path_save=".data",
         delimiter=",",
         skiprows=0,
+        engine="pandas",
     ):
         """
         read_csv_sequential read values from csv database that is not clean
@@ -300,11 +645,11 @@ class POD:
             path_save (str, optional): path to save resutls to. Defaults to ".data".
             delimiter (str, optional): elimiter used in csv files. Defaults to ",".
             skiprows (int, optional):  rows to skip in csv files. Defaults to 0.
+            engine (str, optional): csv parser, "pandas" or "arrow". Defaults to "pandas".
         """
         pathlist = sorted(Path(path_csv).resolve().glob("*.csv"))
 
-        df = pd.read_csv(pathlist[0], sep=delimiter, skiprows=skiprows)
-        df.applymap(lambda x: float(re.sub(r"\[(.*?)\]", "", x)))
+        df = _strip_units(_read_csv(pathlist[0], delimiter, skiprows, engine=engine))
         print(df.head())
         headers = df.columns.tolist()
         print(pd.DataFrame({"Available headers": headers}))
@@ -312,10 +657,11 @@ class POD:
 
         results = [[] for x in range(len(variables))]
         for path_csv in tqdm(pathlist, "analyzing csv files"):
+            # only the first row is used so the rest of the file is not parsed
+            result = _read_csv(path_csv, delimiter, skiprows, nrows=1, engine=engine)
+            result = _strip_units(result)
             for i, var in enumerate(variables):
-                result = pd.read_csv(path_csv, sep=delimiter, skiprows=skiprows)
-                result = result.applymap(lambda x: float(re.sub(r"\[(.*?)\]", "", x)))
-                results[i].append(result[var][0])
+                results[i].append(result[var].iat[0])
 
         for i, var in enumerate(variables):
             utils.ensure_dir(path_save)
@@ -337,38 +683,38 @@ class POD:
         from scipy.fft import fft, fftfreq
         import matplotlib.pyplot as plt
 
-        plt.rc("font", family="Times New Roman")
-        plt.rc("font", size=14)
+        # scoped font settings, the global rcParams of the caller are left untouched
+        style = {"font.family": "Times New Roman", "font.size": 14}
+        with plt.rc_context(style):
+            N = len(signal)
+            T = dt
 
-        N = len(signal)
-        T = dt
+            yf = fft(signal)
+            xf = fftfreq(N, T)[: N // 2]
 
-        yf = fft(signal)
-        xf = fftfreq(N, T)[: N // 2]
+            yff = 2.0 / N * np.abs(yf[1 : N // 2])
+            xff = xf[1 : N // 2]
 
-        yff = 2.0 / N * np.abs(yf[1 : N // 2])
-        xff = xf[1 : N // 2]
-
-        fig, ax = plt.subplots()
-        fig.set_size_inches(5, 4)
-        fig.patch.set_facecolor("w")
-        ax.plot(xff, yff, "k", linewidth=0.75)
-        ax.set_xlim(0, fmax)
-        ax.set_ylim(0, max(yff) * 1.05)
-        ax.set_xlabel("Frequency [Hz]")
-        ax.set_ylabel("FFT magnitude")
+            fig, ax = plt.subplots()
+            fig.set_size_inches(5, 4)
+            fig.patch.set_facecolor("w")
+            ax.plot(xff, yff, "k", linewidth=0.75)
+            ax.set_xlim(0, fmax)
+            ax.set_ylim(0, max(yff) * 1.05)
+            ax.set_xlabel("Frequency [Hz]")
+            ax.set_ylabel("FFT magnitude")
 
-        ax.set_axisbelow(True)
-        ax.grid(alpha=0.5, which="both")
+            ax.set_axisbelow(True)
+            ax.grid(alpha=0.5, which="both")
 
-        fig.tight_layout()
-        for axis in ["bottom", "left"]:
-            ax.spines[axis].set_linewidth(0.5)
-        for axis in ["top", "right"]:
-            ax.spines[axis].set_linewidth(0)
-        plt.savefig(f"{path_save}/fft" + ".png", dpi=300, bbox_inches="tight")
-        plt.close("all")
-        plt.show()
+            fig.tight_layout()
+            for axis in ["bottom", "left"]:
+                ax.spines[axis].set_linewidth(0.5)
+            for axis in ["top", "right"]:
+                ax.spines[axis].set_linewidth(0)
+            plt.savefig(f"{path_save}/fft" + ".png", dpi=300, bbox_inches="tight")
+            plt.close("all")
+            plt.show()
 
     @staticmethod
     def check_parquet(path_parquet=".data"):
@@ -386,49 +732,47 @@ class POD:
             print(len(df))
 
     @staticmethod
-    def correlate(v1, v2):
+    def correlate(v1, v2, maxlag=None):
         """
         correlate find pearson's correlation as well as maximum correlation found for a time lag between signals
 
         Args:
             v1 (series): first variables time series
             v2 (series): second variables time series
+            maxlag (int, optional): largest time lag in samples to search for the maximum correlation. Defaults to None which searches all lags.
 
         Returns:
             (tuple): pearson's index, maximum correlation
         """
-        from scipy import signal
-
-        corr = (
-            signal.correlate(v1 - np.mean(v1), v2 - np.mean(v2), mode="full")
-            / len(v1)
-            / np.std(v1)
-            / np.std(v2)
-        )
-        corr_smooth = (
-            pd.DataFrame(corr)
-            .rolling(window=max(int(len(v1) * 0.01), 5), center=True, closed="both")
-            .mean()
+        v1 = np.asarray(v1, dtype=np.float64).reshape(-1, 1)
+        v2 = np.asarray(v2, dtype=np.float64).reshape(-1, 1)
+        if maxlag is not None:
+            maxlag = min(maxlag, len(v1) - 1, len(v2) - 1)
+        n = _fft_length(len(v1), len(v2), maxlag)
+        corrcoef, corrcoef_adj = _correlate_spectra(
+            _spectra(v1, n), _spectra(v2, n), n, len(v1), len(v2), maxlag
         )
-        lagindex = corr_smooth.iloc[:, 0].argmax()
-
-        corrcoef = corr[int(len(corr) / 2)]
-        corrcoef_adj = corr[lagindex]
-        return corrcoef, corrcoef_adj
+        return corrcoef[0], corrcoef_adj[0]
 
     def svd_save_usv(
         self,
         variables,
         path_parquet=".data",
         path_results_pod=".usv",
+        k=None,
     ):
         """
         svd_save_usv compute distributed Singular Value Decomposition and store results in parquet format.
+        when k is given only the leading k modes are computed with a randomized SVD which is much
+        cheaper than the full decomposition when k is small compared to the number of snapshots.
+        the total snapshot energy is then stored in energy.pkl so the energy plots stay relative
+        to all modes rather than the first k.
 
         Args:
             variables (list or str): list of variables to consider
             path_parquet (str, optional): path to parquet datasets. Defaults to ".data".
             path_results_pod (str, optional): path to store SVD results in. Defaults to ".usv".
+            k (int, optional): number of modes to compute. Defaults to None which means a full SVD.
 
         Raises:
             ValueError: checking for existing folders and warn user about unwanted overwrites
@@ -453,26 +797,58 @@ class POD:
         except:
             pass
 
-        for var in tqdm(variables, "computing SVD modes"):
+        writes, svals, totals = [], [], []
+        for var in tqdm(variables, "preparing SVD graphs"):
             path = Path.cwd() / path_parquet / f"{var}"
             df = dd.read_parquet(path, engine="pyarrow")
-            u, s, v = da.linalg.svd(df.values)
+            # known chunk sizes let u and v be written straight from the dask graph.
+            # read them from the footers when every file maps to one partition,
+            # otherwise fall back to counting the rows of each partition
+            lengths = _parquet_lengths(path)
+            x = df.to_dask_array(
+                lengths=lengths if len(lengths) == df.npartitions else True
+            )
+            if k is None:
+                u, s, v = da.linalg.svd(x)
+            else:
+                u, s, v = da.linalg.svd_compressed(x, k=k, n_power_iter=2)
 
             for name, item in zip(["u", "v"], [u, v]):
-                if np.isnan(item.shape[0]):
-                    item = item.compute()
-                result = dd.from_array(item)
+                result = dd.from_dask_array(item)
                 result.columns = result.columns.astype(str)
-                dd.to_parquet(
-                    result,
-                    f"{path_results_pod}/{var}/{name}",
-                    compression="snappy",
-                    write_metadata_file=True,
+                writes.append(
+                    dd.to_parquet(
+                        result,
+                        f"{path_results_pod}/{var}/{name}",
+                        compression=self.parquet_compression,
+                        compression_level=self.parquet_compression_level,
+                        row_group_size=self.parquet_row_group_size,
+                        write_metadata_file=self.parquet_metadata_file,
+                        compute=False,
+                    )
                 )
-            utils.saveit(s.compute(), f"{path_results_pod}/{var}/s.pkl")
-
+            # s and the energy are wrapped like the parquet writes, so all of them are
+            # dataframe collections and compute together without mixing graph types
+            svals.append(dd.from_dask_array(s))
+            # a truncated s misses the energy of the dropped modes, keep the total
+            totals.append(None if k is None else dd.from_dask_array((x**2).sum(axis=0)))
+
+        # u, v and s share one graph so each decomposition is evaluated once, and
+        # the independent variables are scheduled together to keep workers busy
+        *_, svals, totals = dask.compute(*writes, svals, totals)
+        for var, s, total in zip(variables, svals, totals):
+            utils.saveit(s.to_numpy(), f"{path_results_pod}/{var}/s.pkl")
+            if total is not None:
+                utils.saveit(total.sum(), f"{path_results_pod}/{var}/energy.pkl")
+
+    @_styled
     def svd_correlation(
-        self, variables, maxmode=5, path_results_pod=".usv", path_viz=".viz"
+        self,
+        variables,
+        maxmode=5,
+        path_results_pod=".usv",
+        path_viz=".viz",
+        maxlag=None,
     ):
         """
         svd_correlation produces correlation heatmap between modes for specified variables.
@@ -485,47 +861,29 @@ class POD:
             maxmode (int, optional): maximum number of modes to consider in the correlation map. Defaults to 5.
             path_results_pod (str, optional):  path to read SVD results from. Defaults to ".usv".
             path_viz (str, optional): path to store plots in. Defaults to ".viz".
+            maxlag (int, optional): largest time lag in samples searched for the maximum correlation. Defaults to None which searches all lags.
         """
 
         import matplotlib.pyplot as plt
-        from matplotlib.ticker import AutoMinorLocator, FuncFormatter
+        from matplotlib.ticker import AutoMinorLocator
         from mpl_toolkits.axes_grid1 import make_axes_locatable
-        from itertools import combinations
-        from scipy import signal
-
-        plt.rc("font", family=self.font)
-        plt.rc("font", size=self.fontsize)
+        from scipy.linalg.blas import dsyrk
 
         utils.ensure_dir(path_viz)
 
         variables = variables if type(variables) is list else [variables]
-        path_v = Path.cwd() / path_results_pod / f"{variables[0]}" / "v"
-        df = dd.read_parquet(path_v, engine="pyarrow")
-        df = df.compute().iloc[:maxmode, :].transpose()
-        for v in variables[1:]:
-            path_v = Path.cwd() / path_results_pod / f"{v}" / "v"
-            df2 = dd.read_parquet(path_v, engine="pyarrow")
-            df2 = df2.compute().iloc[:maxmode, :].transpose()
-            df = pd.concat([df, df2], axis=1)
-        df = df.dropna()
-        results = []
-        combs = list(combinations(range(len(df.columns)), 2))
-        for comb in combs:
-            v1 = df.iloc[:, comb[0]]
-            v2 = df.iloc[:, comb[1]]
-            _, corrcoef_adj = self.correlate(v1, v2)
-            results.append(
-                [
-                    comb,
-                    corrcoef_adj,
-                    # lag * self.dt,
-                ]
-            )
-        corr_adjusted = pd.DataFrame(np.nan, columns=df.columns, index=df.columns)
-        for result in results:
-            corr_adjusted.iat[result[0][0], result[0][1]] = result[1]
-        corr = df.corr()
-        corr = corr.where(np.tril(np.ones(corr.shape), k=0).astype(np.bool)).abs()
+        paths_v = [Path.cwd() / path_results_pod / f"{v}" / "v" for v in variables]
+        df = _read_mode_block(paths_v, maxmode)
+        # lag adjusted correlation of every mode pair, kept on the upper triangle
+        _, corr_adjusted = _correlate_batch(df, df, maxlag)
+        corr_adjusted[np.tril_indices_from(corr_adjusted)] = np.nan
+        corr_adjusted = pd.DataFrame(
+            corr_adjusted, columns=df.columns, index=df.columns
+        )
+        # zero lag Pearson correlation on the lower triangle as a single rank-k update
+        z = _standardize(df.to_numpy(), ddof=1)
+        corr = np.abs(dsyrk(1.0 / (len(z) - 1), z, trans=1, lower=1))
+        corr[np.triu_indices_from(corr, k=1)] = np.nan
         fig, ax = plt.subplots()
         fig.set_size_inches(self.width * 2, self.width * 2)
         fig.patch.set_facecolor("w")
@@ -542,11 +900,7 @@ class POD:
             ax.axhline(i * maxmode - 0.5, color="w")
             ax.axvline(i * maxmode - 0.5, color="w")
 
-        varlabels = []
-        for var in variables:
-            label = re.sub(r"\[(.*?)\]", "", var)
-            label = re.sub(r"\.", " ", label)
-            varlabels.append(label)
+        varlabels = [_var_label(var) for var in variables]
 
         majorloc = np.arange(
             np.floor(maxmode / 2),
@@ -563,21 +917,8 @@ class POD:
         ax.xaxis.set_minor_locator(AutoMinorLocator(maxmode))
         ax.yaxis.set_minor_locator(AutoMinorLocator(maxmode))
 
-        indexskip = int((maxmode + 1) / 5)
-        ax.xaxis.set_minor_formatter(
-            FuncFormatter(
-                lambda x, pos: f"{x % maxmode:.0f}"
-                if (x % maxmode) in np.arange(0, maxmode - 1, indexskip)
-                else ""
-            )
-        )
-        ax.yaxis.set_minor_formatter(
-            FuncFormatter(
-                lambda x, pos: f"{x % maxmode:.0f}"
-                if (x % maxmode) in np.arange(0, maxmode - 1, indexskip)
-                else ""
-            )
-        )
+        ax.xaxis.set_minor_formatter(_mode_formatter(maxmode))
+        ax.yaxis.set_minor_formatter(_mode_formatter(maxmode))
         ax.xaxis.remove_overlapping_locs = False
         ax.yaxis.remove_overlapping_locs = False
         ax.tick_params(axis="both", which="both", length=7)
@@ -595,6 +936,7 @@ class POD:
         path_signals=".signals",
         path_signals2=".signals2",
         path_viz=".viz",
+        maxlag=None,
     ):
         """
         correlation_signals plot correlation heatmap between signals.
@@ -604,6 +946,7 @@ class POD:
             path_signals (str, optional): folder for first set of signals. Defaults to ".usv".
             path_signals2 (str, optional): folder for second set of signals. Defaults to ".usv2".
             path_viz (str, optional): path to store plots in. Defaults to ".viz".
+            maxlag (int, optional): largest time lag in samples searched for the maximum correlation. Defaults to None which searches all lags.
         """
         import matplotlib.pyplot as plt
         from mpl_toolkits.axes_grid1 import make_axes_locatable
@@ -623,20 +966,11 @@ class POD:
             signals.append(pd.Series(utils.loadit(path), name=path.name))
         signaldf2 = pd.concat(signals, axis=1)
 
-        dfcorr_adjusted = pd.DataFrame(
-            np.nan, columns=range(signaldf.shape[1]), index=range(signaldf2.shape[1])
-        )
-        dfcorr = pd.DataFrame(
-            np.nan, columns=range(signaldf.shape[1]), index=range(signaldf2.shape[1])
-        )
+        corr, corr_adjusted = _correlate_batch(signaldf, signaldf2, maxlag)
 
-        for i in tqdm(range(signaldf.shape[1]), "computing correlations"):
-            for j in range(signaldf2.shape[1]):
-                v1 = signaldf.iloc[:, i]
-                v2 = signaldf2.iloc[:, j]
-                corrcoef, corrcoef_adj = self.correlate(v1, v2)
-                dfcorr.iat[i, j] = corrcoef
-                dfcorr_adjusted.iat[i, j] = corrcoef_adj
+        # second set of signals on the rows (y axis), first set on the columns (x axis)
+        dfcorr = pd.DataFrame(corr.T)
+        dfcorr_adjusted = pd.DataFrame(corr_adjusted.T)
 
         for name, df in zip(["corr", "corr_adjusted"], [dfcorr, dfcorr_adjusted]):
             fig, ax = plt.subplots()
@@ -692,6 +1026,7 @@ class POD:
             )
             plt.close("all")
 
+    @_styled
     def svd_correlation_2X(
         self,
         variables,
@@ -699,6 +1034,7 @@ class POD:
         path_results_pod=".usv",
         path_results_pod2=".usv2",
         path_viz=".corr2X",
+        maxlag=None,
     ):
         """
         svd_correlation_2X pairwise correlation map between two separe SVD results.
@@ -709,49 +1045,38 @@ class POD:
             path_results_pod (str, optional): first results folder. Will be shown as the y axis. Defaults to ".usv".
             path_results_pod2 (str, optional): second results folder. Will be shown as the x axis. Defaults to ".usv2".
             path_viz (str, optional): path to store plots in. Defaults to ".corr2X".
+            maxlag (int, optional): largest time lag in samples searched for the maximum correlation. Defaults to None which searches all lags.
         """
         import matplotlib.pyplot as plt
-        from matplotlib.ticker import AutoMinorLocator, FuncFormatter
+        from matplotlib.ticker import AutoMinorLocator
         from mpl_toolkits.axes_grid1 import make_axes_locatable
-        from scipy import signal
-
-        plt.rc("font", family=self.font)
-        plt.rc("font", size=self.fontsize)
 
         utils.ensure_dir(path_viz)
 
         variables = variables if type(variables) is list else [variables]
 
-        path_v = Path.cwd() / path_results_pod / f"{variables[0]}" / "v"
-        df = dd.read_parquet(path_v, engine="pyarrow")
-        df = df.compute().iloc[:maxmode, :].transpose()
-        for v in variables[1:]:
-            path_v = Path.cwd() / path_results_pod / f"{v}" / "v"
-            df2 = dd.read_parquet(path_v, engine="pyarrow")
-            df2 = df2.compute().iloc[:maxmode, :].transpose()
-            df = pd.concat([df, df2], axis=1)
-
-        for v in variables:
-            path_v = Path.cwd() / path_results_pod2 / f"{v}" / "v"
-            df2 = dd.read_parquet(path_v, engine="pyarrow")
-            df2 = df2.compute().iloc[:maxmode, :].transpose()
-            df = pd.concat([df, df2], axis=1)
-
-        df = df.dropna()
+        # first results then second results side by side
+        paths_v = [
+            Path.cwd() / path_pod / f"{v}" / "v"
+            for path_pod in [path_results_pod, path_results_pod2]
+            for v in variables
+        ]
+        df = _read_mode_block(paths_v, maxmode)
         len_ = int(len(df.columns) / 2)
-        dfcorr_adjusted = pd.DataFrame(np.nan, columns=range(len_), index=range(len_))
-        dfcorr = pd.DataFrame(np.nan, columns=range(len_), index=range(len_))
-        for i in tqdm(range(len_), "computing correlations"):
-            for j in range(len_):
-                v1 = df.iloc[:, i]
-                v2 = df.iloc[:, len_ + j]
-                corrcoef, corrcoef_adj = self.correlate(v1, v2)
-                dfcorr.iat[i, j] = corrcoef
-                dfcorr_adjusted.iat[i, j] = corrcoef_adj
-
-        diff = dfcorr_adjusted.T - dfcorr_adjusted
-        diff = diff.where(np.triu(np.ones(diff.shape), k=0).astype(np.bool))
+        # first results on the rows, second results on the columns
+        corr, corr_adjusted = _correlate_batch(
+            df.iloc[:, :len_], df.iloc[:, len_:], maxlag
+        )
+        dfcorr = pd.DataFrame(corr)
+        dfcorr_adjusted = pd.DataFrame(corr_adjusted)
 
+        # asymmetry of the adjusted correlation, kept on the upper triangle
+        diff = np.full_like(corr_adjusted, np.nan)
+        upper = np.triu_indices_from(corr_adjusted)
+        diff[upper] = corr_adjusted.T[upper] - corr_adjusted[upper]
+        diff = pd.DataFrame(diff)
+
+        varlabels = [_var_label(var) for var in variables]
         for name, df in zip(
             ["corr", "corr_adjusted", "diff"], [dfcorr, dfcorr_adjusted, diff]
         ):
@@ -769,12 +1094,6 @@ class POD:
                 ax.axhline(i * maxmode - 0.5, color="w")
                 ax.axvline(i * maxmode - 0.5, color="w")
 
-            varlabels = []
-            for var in variables:
-                label = re.sub(r"\[(.*?)\]", "", var)
-                label = re.sub(r"\.", " ", label)
-                varlabels.append(label)
-
             majorloc = np.arange(
                 np.floor(maxmode / 2),
                 maxmode * len(variables) + np.floor(maxmode / 2),
@@ -790,21 +1109,8 @@ class POD:
             ax.xaxis.set_minor_locator(AutoMinorLocator(maxmode))
             ax.yaxis.set_minor_locator(AutoMinorLocator(maxmode))
 
-            indexskip = int((maxmode + 1) / 5)
-            ax.xaxis.set_minor_formatter(
-                FuncFormatter(
-                    lambda x, pos: f"{x % maxmode:.0f}"
-                    if (x % maxmode) in np.arange(0, maxmode - 1, indexskip)
-                    else ""
-                )
-            )
-            ax.yaxis.set_minor_formatter(
-                FuncFormatter(
-                    lambda x, pos: f"{x % maxmode:.0f}"
-                    if (x % maxmode) in np.arange(0, maxmode - 1, indexskip)
-                    else ""
-                )
-            )
+            ax.xaxis.set_minor_formatter(_mode_formatter(maxmode))
+            ax.yaxis.set_minor_formatter(_mode_formatter(maxmode))
             ax.xaxis.remove_overlapping_locs = False
             ax.yaxis.remove_overlapping_locs = False
             ax.tick_params(axis="both", which="both", length=7)
@@ -817,6 +1123,7 @@ class POD:
             )
             plt.close("all")
 
+    @_styled
     def svd_correlation_signals(
         self,
         variables,
@@ -824,6 +1131,7 @@ class POD:
         path_results_pod=".usv",
         path_signals=".signals",
         path_viz=".viz",
+        maxlag=None,
     ):
         """
         svd_correlation_signals plot correlation heatmap between signals in a folder and
@@ -835,48 +1143,30 @@ class POD:
             path_results_pod (str, optional):  path to read SVD results from. Defaults to ".usv".
             path_signals (str, optional): folder for set of signals. Defaults to ".signals".
             path_viz (str, optional): path to save results in. Defaults to ".viz".
+            maxlag (int, optional): largest time lag in samples searched for the maximum correlation. Defaults to None which searches all lags.
         """
         import matplotlib.pyplot as plt
-        from matplotlib.ticker import AutoMinorLocator, FuncFormatter
+        from matplotlib.ticker import AutoMinorLocator
         from mpl_toolkits.axes_grid1 import make_axes_locatable
 
-        plt.rc("font", family=self.font)
-        plt.rc("font", size=self.fontsize)
-
         utils.ensure_dir(path_viz)
 
         variables = variables if type(variables) is list else [variables]
 
-        path_v = Path.cwd() / path_results_pod / f"{variables[0]}" / "v"
-        df = dd.read_parquet(path_v, engine="pyarrow")
-        df = df.compute().iloc[:maxmode, :].transpose()
-        for v in variables[1:]:
-            path_v = Path.cwd() / path_results_pod / f"{v}" / "v"
-            df2 = dd.read_parquet(path_v, engine="pyarrow")
-            df2 = df2.compute().iloc[:maxmode, :].transpose()
-            df = pd.concat([df, df2], axis=1)
-        df = df.dropna()
+        paths_v = [Path.cwd() / path_results_pod / f"{v}" / "v" for v in variables]
+        df = _read_mode_block(paths_v, maxmode)
 
         pathlist = Path(path_signals).resolve().glob("*")
         signals = []
         for path in pathlist:
             signals.append(pd.Series(utils.loadit(path), name=path.name))
         signaldf = pd.concat(signals, axis=1)
-        dfcorr_adjusted = pd.DataFrame(
-            np.nan, columns=range(signaldf.shape[1]), index=range(df.shape[1])
-        )
-        dfcorr = pd.DataFrame(
-            np.nan, columns=range(signaldf.shape[1]), index=range(df.shape[1])
-        )
-
-        for i in tqdm(range(df.shape[1]), "computing correlations"):
-            for j in range(signaldf.shape[1]):
-                v1 = df.iloc[:, i]
-                v2 = signaldf.iloc[:, j]
-                corrcoef, corrcoef_adj = self.correlate(v1, v2)
-                dfcorr.iat[i, j] = corrcoef
-                dfcorr_adjusted.iat[i, j] = corrcoef_adj
+        # modes on the rows, signals on the columns
+        corr, corr_adjusted = _correlate_batch(df, signaldf, maxlag)
+        dfcorr = pd.DataFrame(corr)
+        dfcorr_adjusted = pd.DataFrame(corr_adjusted)
 
+        varlabels = [_var_label(var) for var in variables]
         for name, df in zip(["corr", "corr_adjusted"], [dfcorr, dfcorr_adjusted]):
             fig, ax = plt.subplots()
             fig.set_size_inches(
@@ -900,12 +1190,6 @@ class POD:
             for i in range(1, 1 + len(signaldf.columns)):
                 ax.axvline(i - 0.5, color="w")
 
-            varlabels = []
-            for var in variables:
-                label = re.sub(r"\[(.*?)\]", "", var)
-                label = re.sub(r"\.", " ", label)
-                varlabels.append(label)
-
             majorloc = np.arange(
                 np.floor(maxmode / 2),
                 maxmode * len(variables) + np.floor(maxmode / 2),
@@ -930,14 +1214,7 @@ class POD:
             )
             ax.yaxis.set_minor_locator(AutoMinorLocator(maxmode))
 
-            indexskip = int((maxmode + 1) / 5)
-            ax.yaxis.set_minor_formatter(
-                FuncFormatter(
-                    lambda x, pos: f"{x % maxmode:.0f}"
-                    if (x % maxmode) in np.arange(0, maxmode - 1, indexskip)
-                    else ""
-                )
-            )
+            ax.yaxis.set_minor_formatter(_mode_formatter(maxmode))
             ax.xaxis.remove_overlapping_locs = True
             ax.yaxis.remove_overlapping_locs = False
             ax.tick_params(axis="y", which="both", length=7)
@@ -975,29 +1252,19 @@ class POD:
         Returns:
             list: bounds of analysis and spatial resolution
         """
+        coords = np.stack([np.asarray(c, dtype=np.float64) for c in xyz])
+        mins = coords.min(axis=1)
+        maxs = coords.max(axis=1)
+        lmax = maxs.max()
+        lmin = mins.max()
         if self.dim == "xy":
-            x = xyz[0]
-            y = xyz[1]
-            xmin = min(x)
-            xmax = max(x)
-            ymin = min(y)
-            ymax = max(y)
-            lmax = max(xmax, ymax)
-            lmin = max(xmin, ymin)
+            xmin, ymin = mins
+            xmax, ymax = maxs
             res = (lmax - lmin) / 1000
             return [xmin, xmax, ymin, ymax, 0, 0, res]
         if self.dim == "xyz":
-            x = xyz[0]
-            y = xyz[1]
-            z = xyz[2]
-            xmin = min(x)
-            xmax = max(x)
-            ymin = min(y)
-            ymax = max(y)
-            zmin = min(z)
-            zmax = max(z)
-            lmax = max(xmax, ymax, zmax)
-            lmin = max(xmin, ymin, zmin)
+            xmin, ymin, zmin = mins
+            xmax, ymax, zmax = maxs
             res = (lmax - lmin) / 75
             return [xmin, xmax, ymin, ymax, zmin, zmax, res]
 
@@ -1011,6 +1278,8 @@ class POD:
         path_viz=".viz",
         freq_max=3000,
         dist=False,
+        interactive=True,
+        n_jobs=1,
     ):
         """
         svd_viz distributed visualization of Singular Value Decomposition results
@@ -1024,72 +1293,117 @@ class POD:
             path_viz (str, optional): path to store plots in. Defaults to ".viz".
             freq_max (float, optional): maximum frequency of interest for PSD plots. Defaults to 3kHz.
             dist (float or bool): distance threshold to mask the xy meshgrid using k-d tree method. Defaults to False.
+            interactive (bool, optional): use notebook widgets for 3D mode shapes instead of saving them directly. Defaults to True.
+            n_jobs (int, optional): number of processes plotting variables in parallel, -1 uses all cores. the processes are
+                spawned, so scripts calling this need an if __name__ == "__main__" guard. Defaults to 1.
         """
         variables = variables if type(variables) is list else [variables]
         modelist = modelist if type(modelist) is list else list(modelist)
 
         self.make_dim(coordinates)
 
-        for var in tqdm(variables, "analyzing variables"):
-            utils.ensure_dir(f"{path_viz}/{var}")
-
-            path_u = Path.cwd() / path_results_pod / f"{var}" / "u"
-            path_v = Path.cwd() / path_results_pod / f"{var}" / "v"
-            path_s = Path.cwd() / path_results_pod / f"{var}" / "s.pkl"
-            u = dd.read_parquet(path_u, engine="pyarrow")
-            v = dd.read_parquet(path_v, engine="pyarrow")
-            s = utils.loadit(path_s)
-
-            if self.dim == "xy":
-                path_x = Path.cwd() / path_results_pod / "x.pkl"
-                path_y = Path.cwd() / path_results_pod / "y.pkl"
-                x = utils.loadit(path_x)
-                y = utils.loadit(path_y)
-
-                if bounds == "auto":
-                    bounds = self.make_bounds([x, y])
-
-                if dist:
-                    dist_map = self.dist_map(x, y, bounds)
-
-                self.u_viz(
-                    x,
-                    y,
-                    u,
-                    f"{path_viz}/{var}",
-                    modelist,
-                    bounds,
-                    dist,
-                    dist_map,
-                )
+        args = (
+            modelist,
+            bounds,
+            path_results_pod,
+            path_viz,
+            freq_max,
+            dist,
+            interactive,
+        )
+        n_jobs = os.cpu_count() if n_jobs == -1 else n_jobs
+        # notebook widgets can only be displayed from the main process
+        if n_jobs == 1 or len(variables) == 1 or (self.dim == "xyz" and interactive):
+            for var in tqdm(variables, "analyzing variables"):
+                self._viz_variable(var, *args)
+            return
+
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        # fresh spawned processes, a forked child would inherit the dask client with
+        # its threads dead and block on every compute. the workers read their small
+        # results with the local threaded scheduler instead
+        with ProcessPoolExecutor(
+            max_workers=min(n_jobs, len(variables)),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=dask.config.set,
+            initargs=({"scheduler": "threads"},),
+        ) as executor:
+            futures = [
+                executor.submit(self._viz_variable, var, *args) for var in variables
+            ]
+            for future in tqdm(futures, "analyzing variables"):
+                future.result()
+
+    def _viz_variable(
+        self,
+        var,
+        modelist,
+        bounds,
+        path_results_pod,
+        path_viz,
+        freq_max,
+        dist,
+        interactive,
+    ):
+        """
+        _viz_variable mode shape, coefficient and energy plots of a single variable, see svd_viz
+        """
+        utils.ensure_dir(f"{path_viz}/{var}")
+
+        path_u = Path.cwd() / path_results_pod / f"{var}" / "u"
+        path_v = Path.cwd() / path_results_pod / f"{var}" / "v"
+        u = dd.read_parquet(path_u, engine="pyarrow")
+        v = dd.read_parquet(path_v, engine="pyarrow")
+        s, total_energy = _read_singular_values(
+            Path.cwd() / path_results_pod / f"{var}"
+        )
 
-            if self.dim == "xyz":
-                path_x = Path.cwd() / path_results_pod / "x.pkl"
-                path_y = Path.cwd() / path_results_pod / "y.pkl"
-                path_z = Path.cwd() / path_results_pod / "z.pkl"
-                x = utils.loadit(path_x)
-                y = utils.loadit(path_y)
-                z = utils.loadit(path_z)
-
-                if bounds == "auto":
-                    bounds = self.make_bounds([x, y, z])
-
-                self.u_viz_3d(
-                    x,
-                    y,
-                    z,
-                    u,
-                    f"{path_viz}/{var}",
-                    modelist,
-                    bounds,
-                )
-            self.v_viz(
-                v,
+        if self.dim == "xy":
+            x, y = self._load_coordinates(path_results_pod, "xy")
+
+            if bounds == "auto":
+                bounds = self.make_bounds([x, y])
+
+            # adjust this threshold according to your mesh size
+            # this will mask out the parts of visualization for
+            # which the distance between points exceeds a certain value
+            mask = self.dist_map(x, y, bounds) >= dist if dist else None
+
+            self.u_viz(
+                x,
+                y,
+                u,
                 f"{path_viz}/{var}",
                 modelist,
-                freq_max,
+                bounds,
+                mask,
             )
-            self.s_viz(s, f"{path_viz}/{var}")
+
+        if self.dim == "xyz":
+            x, y, z = self._load_coordinates(path_results_pod, "xyz")
+
+            if bounds == "auto":
+                bounds = self.make_bounds([x, y, z])
+
+            self.u_viz_3d(
+                x,
+                y,
+                z,
+                u,
+                f"{path_viz}/{var}",
+                modelist,
+                bounds,
+                interactive,
+            )
+        self.v_viz(
+            v,
+            f"{path_viz}/{var}",
+            modelist,
+            freq_max,
+        )
+        self.s_viz(s, f"{path_viz}/{var}", total_energy=total_energy)
 
     def s_viz_combined(
         self,
@@ -1112,16 +1426,20 @@ class POD:
 
         utils.ensure_dir(path_viz)
 
-        s_combined = pd.DataFrame(columns=variables)
-        for var in variables:
-
-            path_s = Path.cwd() / path_results_pod / f"{var}" / "s.pkl"
-            s = utils.loadit(path_s)
-
-            mode_energy = [x**2 for x in s]
-            mode_energy = mode_energy / sum(mode_energy) * 100
-            cumsum = np.cumsum(mode_energy)
-            s_combined[var] = cumsum[:maxmode]
+        s, totals = zip(
+            *[
+                _read_singular_values(Path.cwd() / path_results_pod / f"{var}")
+                for var in variables
+            ]
+        )
+        # variables may hold different numbers of singular values, e.g. with other
+        # snapshot counts or a truncated SVD, zero pad them to the longest one
+        padded = np.zeros((max(len(item) for item in s), len(s)))
+        for i, item in enumerate(s):
+            padded[: len(item), i] = item
+        s_combined = pd.DataFrame(
+            _cumulative_energy(padded, totals)[:maxmode], columns=variables
+        )
 
         self.s_viz_combined_plot(s_combined, f"{path_viz}")
 
@@ -1148,6 +1466,7 @@ class POD:
         height=4,
         width=5,
         contour_levels=20,
+        contour=True,
     ):
         """
         set_viz_params set visualization parameters
@@ -1162,6 +1481,9 @@ class POD:
             fontsize (int, optional): font size used in plots. Defaults to 14.
             height (int, optional): plot height in inches. Defaults to 4.
             width (int, optional): plot width in inches. Defaults to 6.
+            contour_levels (int, optional): number of levels in mode shape contours. Defaults to 20.
+            contour (bool, optional): draw 2D mode shapes as filled contours, otherwise the
+                interpolated grid is drawn as an image which is much faster. Defaults to True.
         """
         self.dpi = dpi
         self.linewidth = linewidth
@@ -1173,10 +1495,33 @@ class POD:
         self.width = width
         self.height = height
         self.contour_levels = contour_levels
+        self.contour = contour
+
+    def _load_coordinates(self, path, axes):
+        """
+        _load_coordinates read the pickled coordinate arrays of a results folder.
+        the arrays are cached and only read again when the pickle on disk changes
+
+        Args:
+            path (str): folder holding the x.pkl, y.pkl and z.pkl files
+            axes (str): coordinates to load, e.g. "xy" or "xyz"
+
+        Returns:
+            list: coordinate arrays in the order of axes
+        """
+        coordinates = []
+        for axis in axes:
+            path_c = Path.cwd() / path / f"{axis}.pkl"
+            key = (str(path_c), path_c.stat().st_mtime_ns)
+            if key not in self._coord_cache:
+                self._coord_cache[key] = utils.loadit(path_c)
+            coordinates.append(self._coord_cache[key])
+        return coordinates
 
     def dist_map(self, x, y, bounds):
         """
         dist_map generate a kd-tree distance map for all xy coordinates. sed to mask the visualization results for which no data exists
+        the map is cached per geometry and bounds so repeated visualizations reuse it
 
         Args:
             x (list): list of x coordination values
@@ -1189,11 +1534,18 @@ class POD:
         """
         from scipy.spatial import KDTree
 
+        x = np.asarray(x)
+        y = np.asarray(y)
+        key = (tuple(bounds), hash(x.tobytes()), hash(y.tobytes()))
+        if key in self._dist_cache:
+            return self._dist_cache[key]
+
         xx, yy = self.make_meshgrid(bounds)
 
         tree = KDTree(np.c_[x, y])
-        dist, _ = tree.query(np.c_[xx.ravel(), yy.ravel()], k=1)
+        dist, _ = tree.query(np.c_[xx.ravel(), yy.ravel()], k=1, workers=-1)
         dist = dist.reshape(xx.shape)
+        self._dist_cache[key] = dist
         return dist
 
     def make_meshgrid(self, bounds):
@@ -1253,6 +1605,7 @@ class POD:
         path_viz,
         modelist,
         bounds,
+        interactive=True,
     ):
         """
         u_viz_3d 3D visualization of SVD mode shapes
@@ -1265,21 +1618,26 @@ class POD:
             path_viz (str): path to store plots in
             modelist (list): mode numbers to visualize
             bounds (list): visualization boundaries and resolution
+            interactive (bool, optional): show notebook widgets to tune and save each mode,
+                otherwise write the png files directly. Defaults to True.
         """
-        from scipy.interpolate import griddata
+        from scipy.interpolate import LinearNDInterpolator
+        from scipy.spatial import Delaunay
         import plotly.graph_objects as go
         import plotly.io as pio
-        from ipywidgets import (
-            interact,
-            FloatSlider,
-            FloatRangeSlider,
-            Layout,
-            Button,
-        )
-        from IPython.display import display
-        from IPython.core.interactiveshell import InteractiveShell
 
-        InteractiveShell.ast_node_interactivity = "all"
+        if interactive:
+            from ipywidgets import (
+                interact,
+                FloatSlider,
+                FloatRangeSlider,
+                Layout,
+                Button,
+            )
+            from IPython.display import display
+            from IPython.core.interactiveshell import InteractiveShell
+
+            InteractiveShell.ast_node_interactivity = "all"
 
         pio.templates["custom"] = go.layout.Template(
             layout=go.Layout(
@@ -1293,23 +1651,22 @@ class POD:
         xx, yy, zz = self.make_meshgrid(bounds)
 
         figs = [[] for x in range(max(modelist) + 1)]
-
-        for mode in tqdm(modelist, "creating plots", leave=False):
-            uu = u.iloc[:, mode].compute()
-            kk = griddata(
-                (x, z, y),
-                uu,
-                (xx, zz, yy),
-                method="linear",
-                fill_value=min(abs(uu)),
-            )
+        # the tetrahedralization only depends on the coordinates, build it once
+        tri = Delaunay(np.column_stack([x, z, y]))
+        modes = u[[u.columns[mode] for mode in modelist]].compute().to_numpy()
+        fields = LinearNDInterpolator(tri, modes)(xx, zz, yy)
+
+        for i, mode in enumerate(tqdm(modelist, "creating plots", leave=False)):
+            kk = fields[..., i]
+            kk = np.where(np.isnan(kk), np.abs(modes[:, i]).min(), kk)
             kmin = kk.min()
             kmax = kk.max()
             krng = kmax - kmin
             kmean = kk.mean()
             stp = krng / 100
-            kwargs = dict(layout=Layout(width="700px"), readout_format=".4f")
-            fig = go.FigureWidget(
+            # widgets are only needed to tune the isosurfaces in a notebook
+            figure = go.FigureWidget if interactive else go.Figure
+            fig = figure(
                 data=go.Isosurface(
                     x=xx.flatten(),
                     z=yy.flatten(),
@@ -1357,8 +1714,13 @@ class POD:
                 ),
                 margin=go.layout.Margin(l=0, r=0, b=0, t=0, pad=0),
             )
+            if not interactive:
+                fig.write_image(f"{path_viz}/u{mode}_3D" + ".png", scale=4)
+                continue
+
             figs[mode] = fig
             print(f"fig_id = {mode}")
+            kwargs = dict(layout=Layout(width="700px"), readout_format=".4f")
 
             @interact(
                 fig_id=modelist,
@@ -1398,7 +1760,8 @@ class POD:
 
             display(savebutton, fig)
 
-    def u_viz(self, x, y, u, path_viz, modelist, bounds, dist, dist_map):
+    @_styled
+    def u_viz(self, x, y, u, path_viz, modelist, bounds, mask=None):
         """
         u_viz 2D visualization of SVD mode shapes
 
@@ -1410,66 +1773,82 @@ class POD:
             path_viz (str): path to store plots in
             modelist (list): mode numbers to visualize
             bounds (list): visualization boundaries and resolution
-            dist (float): distance threshold to mask out mode shapes
-            dist_map (ndarray): k-d tree distance map for coordinates
+            mask (ndarray, optional): meshgrid points to mask out of the mode shapes, e.g. a thresholded
+                k-d tree distance map. Defaults to None.
         """
-        from scipy.interpolate import griddata
+        from scipy.interpolate import LinearNDInterpolator
+        from scipy.spatial import Delaunay
         import matplotlib.pyplot as plt
 
-        plt.rc("font", family=self.font)
-        plt.rc("font", size=self.fontsize)
-
         xmin, xmax, ymin, ymax, res = bounds
         xx, yy = self.make_meshgrid(bounds)
+        # the triangulation only depends on the coordinates, build it once for all modes
+        tri = Delaunay(np.column_stack([x, y]))
+        # read all requested modes in a single pass instead of one compute per mode
+        modes = u[[u.columns[mode] for mode in modelist]].compute().to_numpy()
+        # locate the grid points once and interpolate all modes in a single call
+        fields = LinearNDInterpolator(tri, modes)(xx, yy)
+        # points outside the convex hull take the smallest magnitude of each mode,
+        # masked points stay NaN and are left blank in the plots
+        fields = np.where(np.isnan(fields), np.abs(modes).min(axis=0), fields)
+        if mask is not None:
+            fields[mask] = np.nan
+
+        # pixel edges of the meshgrid for image plots
+        extent = [xx.min() - res / 2, xx.max() + res / 2]
+        extent += [yy.min() - res / 2, yy.max() + res / 2]
+        bbox = "tight"
+
+        # every mode shares the same axes, only the mode field is redrawn
+        fig, ax = plt.subplots(1)
+        fig.set_size_inches(self.width, self.height)
+        fig.patch.set_facecolor("w")
+        ax.set_xlabel("")
+        ax.set_ylabel("")
+        ax.axes.xaxis.set_visible(False)
+        ax.axes.yaxis.set_visible(False)
+        ax.set_xlim(xmin, xmax)
+        ax.set_ylim(ymin, ymax)
+        ax.set_aspect(1)
+        ax.set_axisbelow(True)
+        ax.grid(alpha=0.5)
+        for axis in ["top", "bottom", "left", "right"]:
+            ax.spines[axis].set_linewidth(self.ax_width)
 
-        for mode in tqdm(modelist, "plotting 2D mode shapes", leave=False):
-            uu = u.iloc[:, mode].compute()
-            kk = griddata(
-                (x, y),
-                uu,
-                (xx, yy),
-                method="linear",
-                fill_value=min(abs(uu)),
-            )
-            if dist is not None:
-                # adjust this threshold according to your mesh size
-                # this will mask out the parts of visualization for
-                # which the distance between points exceeds a certain value
-                kk[dist_map >= dist] = np.nan
-
-            fig, ax = plt.subplots(1)
-            fig.set_size_inches(self.width, self.height)
-            fig.patch.set_facecolor("w")
-            ax.set_xlabel("")
-            ax.set_ylabel("")
-            ax.axes.xaxis.set_visible(False)
-            ax.axes.yaxis.set_visible(False)
-            ax.set_xlim(xmin, xmax)
-            ax.set_ylim(ymin, ymax)
-            ax.set_aspect(1)
-            ax.set_axisbelow(True)
-            ax.grid(alpha=0.5)
-            kk[np.isnan(kk)] = np.min(abs(kk))
-
-            contour = ax.contourf(
-                xx,
-                yy,
-                kk,
-                self.contour_levels,
-                cmap=self.cmap,
-                antialiased=True,
-                extend="both",
-            )
-            for c in contour.collections:
-                c.set_edgecolor("face")
-            fig.tight_layout()
-            for axis in ["top", "bottom", "left", "right"]:
-                ax.spines[axis].set_linewidth(self.ax_width)
-            plt.savefig(
-                f"{path_viz}/u{mode}" + ".png", dpi=self.dpi, bbox_inches="tight"
-            )
-            plt.close("all")
-
+        for i, mode in enumerate(
+            tqdm(modelist, "plotting 2D mode shapes", leave=False)
+        ):
+            kk = fields[..., i]
+            if self.contour:
+                field = ax.contourf(
+                    xx,
+                    yy,
+                    kk,
+                    self.contour_levels,
+                    cmap=self.cmap,
+                    antialiased=True,
+                    extend="both",
+                )
+                # hide the seams between filled levels
+                field.set_edgecolor("face")
+            else:
+                field = ax.imshow(
+                    kk,
+                    origin="lower",
+                    extent=extent,
+                    cmap=self.cmap,
+                    interpolation="bilinear",
+                )
+            if bbox == "tight":
+                fig.tight_layout()
+            plt.savefig(f"{path_viz}/u{mode}" + ".png", dpi=self.dpi, bbox_inches=bbox)
+            if bbox == "tight":
+                # same layout for every mode, measure the tight box only once
+                bbox = fig.get_tightbbox().padded(plt.rcParams["savefig.pad_inches"])
+            field.remove()
+        plt.close(fig)
+
+    @_styled
     def v_viz(self, v, path_viz, modelist, freq_max):
         """
         uv_viz visualize u and v matrix of SVD result. used in svd.viz.
@@ -1483,79 +1862,106 @@ class POD:
             modelist (list): list of modes to visualize
             freq_max (int): maximum frequency to consider is PSD graphs
         """
-        from scipy.signal import find_peaks
+        from scipy.signal import find_peaks, welch
 
         import matplotlib.pyplot as plt
-        import matplotlib.mlab as mlab
 
-        plt.rc("font", family=self.font)
-        plt.rc("font", size=self.fontsize)
-        for mode in tqdm(modelist, "plotting mode coefficients", leave=False):
-            vv = v.compute().iloc[mode, :]
-            tt = np.arange(self.t0, vv.shape[0] * self.dt, self.dt)
+        # materialize the requested coefficients once instead of the whole of v per mode
+        coefficients = v.compute().iloc[modelist, :].to_numpy()
 
-            fig, ax = plt.subplots(1)
-            fig.set_size_inches(self.width, self.height)
-            fig.patch.set_facecolor("w")
-            ax.set_xlabel("Time [s]")
-            ax.set_ylabel("Coefficient")
-            ax.grid(alpha=0.5)
-            ax.set_xlim(tt[0], tt[-1])
-            ax.plot(tt, vv, self.color, linewidth=self.linewidth)
+        # power spectral density of all modes in one call with the mlab.psd defaults,
+        # 256 sample hanning segments without overlap, zero padded for short records
+        nfft = 256
+        padded = np.pad(
+            coefficients, ((0, 0), (0, max(0, nfft - coefficients.shape[1])))
+        )
+        freqs, Pxx = welch(
+            padded,
+            fs=1 / self.dt,
+            window=np.hanning(nfft),
+            nperseg=nfft,
+            noverlap=0,
+            detrend="linear",
+            axis=1,
+        )
+        freqs = freqs[freqs < freq_max]
+        dbPxx_modes = 10 * np.log10(Pxx[:, : len(freqs)])
+
+        tt = np.arange(self.t0, coefficients.shape[1] * self.dt, self.dt)
+
+        # one figure per plot type is reused for all modes, only the data changes
+        fig_t, ax_t = plt.subplots(1)
+        fig_t.set_size_inches(self.width, self.height)
+        fig_t.patch.set_facecolor("w")
+        ax_t.set_xlabel("Time [s]")
+        ax_t.set_ylabel("Coefficient")
+        ax_t.grid(alpha=0.5)
+        ax_t.set_xlim(tt[0], tt[-1])
+        (line_t,) = ax_t.plot(tt, coefficients[0], self.color, linewidth=self.linewidth)
+
+        fig_p, ax_p = plt.subplots(1)
+        fig_p.set_size_inches(self.width, self.height)
+        fig_p.patch.set_facecolor("w")
+        ax_p.set_xlabel("Frequency [Hz]")
+        ax_p.set_ylabel("Power Spectral Density [db/Hz]")
+        ax_p.grid(alpha=0.5)
+        ax_p.set_xlim(0, freq_max)
+        (line_p,) = ax_p.plot(
+            freqs, dbPxx_modes[0], self.color, linewidth=self.linewidth
+        )
 
-            fig.tight_layout()
+        for ax in [ax_t, ax_p]:
             for axis in ["bottom", "left"]:
                 ax.spines[axis].set_linewidth(self.ax_width)
             for axis in ["top", "right"]:
                 ax.spines[axis].set_linewidth(0)
-            plt.savefig(
-                f"{path_viz}/v{mode}" + ".png", dpi=self.dpi, bbox_inches="tight"
-            )
 
-            fig, ax = plt.subplots(1)
-            fig.set_size_inches(self.width, self.height)
-            fig.patch.set_facecolor("w")
-            ax.set_xlabel("Frequency [Hz]")
-            ax.set_ylabel("Power Spectral Density [db/Hz]")
-            ax.grid(alpha=0.5)
-            ax.set_xlim(0, freq_max)
-
-            Pxx, freqs = mlab.psd(
-                vv,
-                Fs=1 / self.dt,
-                window=mlab.window_hanning,
-                detrend="linear",
-            )
-            freqs = freqs[np.where(freqs < freq_max)]
-            Pxx = Pxx[: len(freqs)]
-            dbPxx = 10 * np.log10(Pxx)
+        npeaks = 3
+        acc = int(np.floor(abs(np.log(freq_max))))
+        for i, mode in enumerate(
+            tqdm(modelist, "plotting mode coefficients", leave=False)
+        ):
+            line_t.set_ydata(coefficients[i])
+            ax_t.relim()
+            ax_t.autoscale_view(scalex=False)
+            fig_t.tight_layout()
+            # tight_layout already fits the labels, skip the extra tight bbox pass
+            fig_t.savefig(f"{path_viz}/v{mode}" + ".png", dpi=self.dpi)
+
+            dbPxx = dbPxx_modes[i]
             peaks, _ = find_peaks(dbPxx, prominence=10)
-            ax.plot(freqs, dbPxx, self.color, linewidth=self.linewidth)
-            npeaks = 3
+            line_p.set_ydata(dbPxx)
+            ax_p.relim()
+            ax_p.autoscale_view(scalex=False)
+            markers = []
             for n in range(0, min(npeaks, len(peaks))):
-                ax.scatter(
-                    freqs[peaks[n]],
-                    dbPxx[peaks[n]],
-                    s=80,
-                    facecolors="none",
-                    edgecolors="grey",
+                markers.append(
+                    ax_p.scatter(
+                        freqs[peaks[n]],
+                        dbPxx[peaks[n]],
+                        s=80,
+                        facecolors="none",
+                        edgecolors="grey",
+                    )
                 )
-                acc = int(np.floor(abs(np.log(freq_max))))
-                ax.annotate(
-                    f"{freqs[peaks[n]]:0.{acc}f}",
-                    xy=(freqs[peaks[n]] + freq_max / 25, dbPxx[peaks[n]] * 0.99),
+                markers.append(
+                    ax_p.annotate(
+                        f"{freqs[peaks[n]]:0.{acc}f}",
+                        xy=(freqs[peaks[n]] + freq_max / 25, dbPxx[peaks[n]] * 0.99),
+                    )
                 )
-            fig.tight_layout()
-            for axis in ["bottom", "left"]:
-                ax.spines[axis].set_linewidth(self.ax_width)
-            for axis in ["top", "right"]:
-                ax.spines[axis].set_linewidth(0)
-            plt.savefig(
+            fig_p.tight_layout()
+            fig_p.savefig(
                 f"{path_viz}/v{mode}_PSD" + ".png", dpi=self.dpi, bbox_inches="tight"
             )
-            plt.close("all")
+            for marker in markers:
+                marker.remove()
 
-    def s_viz(self, s, path_viz, maxmode=100):
+        plt.close(fig_t)
+        plt.close(fig_p)
+
+    @_styled
+    def s_viz(self, s, path_viz, maxmode=100, total_energy=None):
         """
         s_viz visualize s diagonal matrix of SVD result
 
@@ -1563,13 +1969,11 @@ class POD:
             s (series): eigenvalues of SVD analysis
             path_viz (str): path to save results
             modelist (int, optional): Defaults to 20.
+            total_energy (float, optional): energy of all modes when s is truncated. Defaults to None which means the sum of s**2.
         """
         import matplotlib.pyplot as plt
         import matplotlib.ticker as mtick
 
-        plt.rc("font", family=self.font)
-        plt.rc("font", size=self.fontsize)
-
         fig, ax = plt.subplots(1)
         fig.set_size_inches(self.width, self.height)
         fig.patch.set_facecolor("w")
@@ -1579,10 +1983,7 @@ class POD:
         ax.set_axisbelow(True)
         ax.grid(alpha=0.5, which="both")
 
-        mode_energy = [x**2 for x in s]
-        mode_energy = mode_energy / sum(mode_energy) * 100
-        cumsum = np.cumsum(mode_energy)
-        s = cumsum[:maxmode]
+        s = _cumulative_energy(s, total_energy)[:maxmode]
         ax.set_ylim(s[0] - 10, 100)
         ax.set_xlim(0, maxmode)
         ax.plot(s, self.color, linewidth=self.linewidth)
@@ -1591,9 +1992,10 @@ class POD:
             ax.spines[axis].set_linewidth(self.ax_width)
         for axis in ["top", "right"]:
             ax.spines[axis].set_linewidth(0)
-        plt.savefig(f"{path_viz}/s" + ".png", dpi=self.dpi, bbox_inches="tight")
+        plt.savefig(f"{path_viz}/s" + ".png", dpi=self.dpi)
         plt.close("all")
 
+    @_styled
     def s_viz_combined_plot(self, s, path_viz):
         """
         s_viz_combined visualize combined s plot
@@ -1605,9 +2007,6 @@ class POD:
         import matplotlib.pyplot as plt
         import matplotlib.ticker as mtick
 
-        plt.rc("font", family=self.font)
-        plt.rc("font", size=self.fontsize)
-
         clrs_list = ["k", "b", "g", "r"]
         styl_list = ["-", "--", "-.", ":"]
 
@@ -1623,8 +2022,7 @@ class POD:
         ax.set_ylim(min(s.min(axis=1)) - 10, 100)
         ax.set_xlim(0, s.shape[0])
         for i, var in enumerate(s.columns):
-            label = re.sub(r"\[(.*?)\]", "", var)
-            label = re.sub(r"\.", " ", label)
+            label = _var_label(var)
             clrr = clrs_list[i // 4]
             styl = styl_list[i % 4]
             ax.plot(s[var], linewidth=self.linewidth, label=label, color=clrr, ls=styl)
@@ -1635,7 +2033,5 @@ class POD:
             ax.spines[axis].set_linewidth(self.ax_width)
         for axis in ["top", "right"]:
             ax.spines[axis].set_linewidth(0)
-        plt.savefig(
-            f"{path_viz}/s_combined" + ".png", dpi=self.dpi, bbox_inches="tight"
-        )
+        plt.savefig(f"{path_viz}/s_combined" + ".png", dpi=self.dpi)
         plt.close("all")